@@ -1,7 +1,12 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Request
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -12,19 +17,28 @@ import schemas
 import crud
 import models
 from tasks import (
-    run_tjmg_ingestion_with_retry,
+    create_ingestion_log,
+    run_tjmg_ingestion_job,
     get_last_ingestion_status,
     get_ingestion_history,
     get_ingestion_stats
 )
 from config import settings
 from auth import create_access_token, get_current_hospital, get_password_hash, verify_password
+from cache import cache_get, cache_set
 
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Criar tabelas no startup (e não no import: evita DB round-trips em
+    # cada worker/test-collection quando desabilitado via env)
+    if settings.AUTO_CREATE_TABLES:
+        Base.metadata.create_all(bind=engine)
+    yield
 
 # Inicializar app
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description="""
@@ -45,8 +59,13 @@ app = FastAPI(
     """
 )
 
-# Rate Limiting
-limiter = Limiter(key_func=get_remote_address)
+# Rate Limiting: com Redis configurado os contadores são compartilhados
+# entre workers (senão cada worker teria sua própria cota em memória)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.REDIS_URL or "memory://",
+    strategy="fixed-window",
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -76,14 +95,22 @@ def health():
 @app.get("/stats/platform", tags=["Estatísticas"])
 def get_platform_stats(db: Session = Depends(get_db)):
     """Estatísticas gerais da plataforma (público)"""
-    total_cases = db.query(models.Case).count()
-    open_cases = db.query(models.Case).filter(models.Case.status == "open").count()
-    awarded_cases = db.query(models.Case).filter(models.Case.status == "awarded").count()
+    cached = cache_get("stats:platform")
+    if cached is not None:
+        return cached
+
+    # Uma query agrupada por status em vez de três COUNTs sobre cases
+    cases_by_status = dict(
+        db.execute(select(models.Case.status, func.count()).group_by(models.Case.status)).all()
+    )
+    total_cases = sum(cases_by_status.values())
+    open_cases = cases_by_status.get("open", 0)
+    awarded_cases = cases_by_status.get("awarded", 0)
     total_hospitals = db.query(models.Hospital).filter(models.Hospital.is_active == True).count()
     total_bids = db.query(models.Bid).count()
     total_value = db.query(func.sum(models.Award.amount)).scalar() or 0
     
-    return {
+    result = {
         "total_cases": total_cases,
         "open_cases": open_cases,
         "awarded_cases": awarded_cases,
@@ -91,35 +118,40 @@ def get_platform_stats(db: Session = Depends(get_db)):
         "total_bids": total_bids,
         "total_awarded_value": float(total_value)
     }
+    cache_set("stats:platform", result, ttl=settings.STATS_CACHE_TTL)
+    return result
 
 # ==================== AUTENTICAÇÃO ====================
 
 @app.post("/auth/register", response_model=schemas.TokenResponse, tags=["Autenticação"])
 @limiter.limit("3/minute")
-def register_hospital(request: Request, data: schemas.HospitalRegister, db: Session = Depends(get_db)):
+async def register_hospital(request: Request, data: schemas.HospitalRegister, db: Session = Depends(get_db)):
     """Registrar novo hospital na plataforma"""
-    # Verificar se email já existe
-    existing = db.query(models.Hospital).filter(models.Hospital.email == data.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email já cadastrado")
-    
-    # Verificar se nome já existe
-    existing_name = db.query(models.Hospital).filter(models.Hospital.name == data.name).first()
-    if existing_name:
-        raise HTTPException(status_code=400, detail="Nome do hospital já cadastrado")
-    
-    # Criar hospital
+    # Hash de senha é CPU-bound (~centenas de ms com bcrypt): executar
+    # fora do event loop para não travar o worker
+    password_hash = await asyncio.get_running_loop().run_in_executor(
+        None, get_password_hash, data.password
+    )
+
+    # Criar hospital; as constraints UNIQUE de email/nome detectam
+    # duplicatas no próprio INSERT (dispensa os SELECTs de pré-verificação)
     hospital = models.Hospital(
         name=data.name,
         city=data.city,
         email=data.email,
-        password_hash=get_password_hash(data.password),
+        password_hash=password_hash,
         specialties=data.specialties,
         credentials=data.credentials,
         is_active=True
     )
     db.add(hospital)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if "email" in str(e.orig):
+            raise HTTPException(status_code=400, detail="Email já cadastrado")
+        raise HTTPException(status_code=400, detail="Nome do hospital já cadastrado")
     db.refresh(hospital)
     
     # Gerar token
@@ -132,10 +164,13 @@ def register_hospital(request: Request, data: schemas.HospitalRegister, db: Sess
 
 @app.post("/auth/login", response_model=schemas.TokenResponse, tags=["Autenticação"])
 @limiter.limit("5/minute")
-def login_hospital(request: Request, data: schemas.HospitalLogin, db: Session = Depends(get_db)):
+async def login_hospital(request: Request, data: schemas.HospitalLogin, db: Session = Depends(get_db)):
     """Login de hospital existente"""
     hospital = db.query(models.Hospital).filter(models.Hospital.email == data.email).first()
-    if not hospital or not verify_password(data.password, hospital.password_hash):
+    password_ok = hospital is not None and await asyncio.get_running_loop().run_in_executor(
+        None, verify_password, data.password, hospital.password_hash
+    )
+    if not password_ok:
         raise HTTPException(status_code=401, detail="Email ou senha inválidos")
     
     if not hospital.is_active:
@@ -177,6 +212,8 @@ def list_opportunities(
         page=page,
         page_size=page_size
     )
+    # DTOs montados sem validação: as linhas já vieram tipadas do banco
+    result["items"] = [schemas.to_out(schemas.CaseOut, c) for c in result["items"]]
     return result
 
 @app.get("/cases/{case_id}", response_model=schemas.CaseOut, tags=["Oportunidades"])
@@ -193,7 +230,7 @@ def list_case_bids(case_id: int, db: Session = Depends(get_db)):
     case = db.get(models.Case, case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Caso não encontrado")
-    
+
     return crud.get_case_bids(db, case_id)
 
 # ==================== HOSPITAIS ====================
@@ -217,21 +254,22 @@ def get_hospital_stats(
     """Estatísticas do hospital (apenas próprio hospital)"""
     if hospital_id != current_hospital.id:
         raise HTTPException(status_code=403, detail="Acesso negado")
-    
-    total_bids = db.query(models.Bid).filter(models.Bid.hospital_id == hospital_id).count()
-    won_bids = db.query(models.Bid).filter(
-        models.Bid.hospital_id == hospital_id,
-        models.Bid.status == "won"
-    ).count()
-    
-    total_awarded = db.query(models.Award).filter(
-        models.Award.hospital_id == hospital_id
-    ).count()
-    
-    total_revenue = db.query(func.sum(models.Award.amount)).filter(
-        models.Award.hospital_id == hospital_id
-    ).scalar() or 0
-    
+
+    # Agregação condicional: 2 round-trips (bids + awards) em vez de 4
+    total_bids, won_bids = db.execute(
+        select(
+            func.count(models.Bid.id),
+            func.coalesce(func.sum(case((models.Bid.status == "won", 1), else_=0)), 0)
+        ).where(models.Bid.hospital_id == hospital_id)
+    ).one()
+
+    total_awarded, total_revenue = db.execute(
+        select(
+            func.count(models.Award.id),
+            func.coalesce(func.sum(models.Award.amount), 0)
+        ).where(models.Award.hospital_id == hospital_id)
+    ).one()
+
     return {
         "hospital_id": hospital_id,
         "hospital_name": current_hospital.name,
@@ -276,7 +314,7 @@ def list_hospital_bids(
     """Lista todos os orçamentos de um hospital (apenas próprio hospital)"""
     if hospital_id != current_hospital.id:
         raise HTTPException(status_code=403, detail="Acesso negado")
-    
+
     return crud.get_hospital_bids(db, hospital_id, status)
 
 # ==================== ADJUDICAÇÃO ====================
@@ -290,36 +328,47 @@ def award_case(case_id: int, data: schemas.AwardCreate, db: Session = Depends(ge
 
 @app.post("/ingest/tjmg/run", tags=["Admin"])
 def ingest_tjmg(
+    background_tasks: BackgroundTasks,
     n: int = 10,
     use_real: bool = False,
     max_attempts: int = 3,
     db: Session = Depends(get_db)
 ):
     """
-    Executar ingestão de processos do TJMG com retry automático.
-    
+    Agendar ingestão de processos do TJMG com retry automático.
+
     Args:
         n: Número de processos a capturar (padrão: 10)
         use_real: Se True, usa scraping real do PJe. Se False, usa dados mock (padrão: False)
         max_attempts: Número máximo de tentativas em caso de erro (padrão: 3)
-    
+
     Returns:
-        Resultado da ingestão com estatísticas
-    
+        log_id da execução agendada; acompanhe via GET /ingest/status
+
     Exemplo:
         POST /ingest/tjmg/run?n=30&use_real=true&max_attempts=5
-    
-    O robô tentará executar até conseguir sucesso ou atingir o número máximo de tentativas.
-    Em caso de erro, aguarda com backoff exponencial antes de tentar novamente.
+
+    A ingestão roda em background (com scraping real e retries ela pode levar
+    minutos, e mantê-la na request bloquearia um worker). O robô tenta até
+    conseguir sucesso ou atingir o número máximo de tentativas, com backoff
+    exponencial entre tentativas.
     """
-    result = run_tjmg_ingestion_with_retry(
+    log = create_ingestion_log(
         db,
+        mode="real" if use_real else "mock",
+        requested_count=n,
+        execution_type="api",
+        max_attempts=max_attempts
+    )
+    background_tasks.add_task(
+        run_tjmg_ingestion_job,
+        log.id,
         n=n,
         use_real=use_real,
         execution_type="api",
         max_attempts=max_attempts
     )
-    return result
+    return {"log_id": log.id, "status": "queued"}
 
 @app.get("/ingest/status", tags=["Admin"])
 def get_ingestion_status(db: Session = Depends(get_db)):
@@ -342,24 +391,39 @@ def get_ingestion_status(db: Session = Depends(get_db)):
 @app.get("/ingest/history", tags=["Admin"])
 def get_ingestion_history_endpoint(
     limit: int = 10,
+    before: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
     Consultar histórico de execuções do robô.
-    
+
     Args:
         limit: Número máximo de registros a retornar (padrão: 10)
-    
+        before: Cursor de paginação — só execuções com log_id menor
+            que este (usar o next_cursor da página anterior)
+
     Returns:
-        Lista com as últimas execuções do robô
-    
+        Lista com as últimas execuções do robô e cursor da próxima página
+
     Exemplo:
         GET /ingest/history?limit=20
+        GET /ingest/history?limit=20&before=42
     """
-    return {
-        "history": get_ingestion_history(db, limit=limit),
-        "total_returned": min(limit, len(get_ingestion_history(db, limit=limit)))
+    # "'' if ... is None" e não "before or ''": before=0 é um cursor
+    # válido (página vazia) e não pode colidir com a chave da primeira página
+    cache_key = f"ingest:history:{limit}:{'' if before is None else before}"
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    page = get_ingestion_history(db, limit=limit, before=before)
+    result = {
+        "history": page["items"],
+        "total_returned": len(page["items"]),
+        "next_cursor": page["next_cursor"]
     }
+    cache_set(cache_key, result, ttl=settings.INGEST_CACHE_TTL)
+    return result
 
 @app.get("/ingest/stats", tags=["Admin"])
 def get_ingestion_stats_endpoint(db: Session = Depends(get_db)):
@@ -377,5 +441,11 @@ def get_ingestion_stats_endpoint(db: Session = Depends(get_db)):
     Exemplo:
         GET /ingest/stats
     """
-    return get_ingestion_stats(db)
+    cached = cache_get("ingest:stats")
+    if cached is not None:
+        return cached
+
+    result = get_ingestion_stats(db)
+    cache_set("ingest:stats", result, ttl=settings.INGEST_CACHE_TTL)
+    return result
 
@@ -7,9 +7,10 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from config import settings
 from db import SessionLocal
+from cache import cache_get, cache_set, cache_delete
 import models
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 security = HTTPBearer()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -55,14 +56,47 @@ def get_db():
     finally:
         db.close()
 
+def _hospital_cache_key(hospital_id: int) -> str:
+    return f"hospital:{hospital_id}"
+
+def invalidate_hospital_cache(hospital_id: int):
+    """Invalida o cache de um hospital (chamar em qualquer mutação de Hospital)."""
+    cache_delete(_hospital_cache_key(hospital_id))
+
 def get_current_hospital(
     hospital_id: int = Depends(verify_token),
     db: Session = Depends(get_db)
 ) -> models.Hospital:
+    # Cache em Redis evita um SELECT por request autenticado
+    cached = cache_get(_hospital_cache_key(hospital_id))
+    if cached is not None:
+        if not cached["is_active"]:
+            raise HTTPException(status_code=403, detail="Hospital inativo")
+        created_at = cached.pop("created_at", None)
+        hospital = models.Hospital(**cached)
+        if created_at:
+            hospital.created_at = datetime.fromisoformat(created_at)
+        return hospital
+
     hospital = db.get(models.Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital não encontrado")
     if not hospital.is_active:
         raise HTTPException(status_code=403, detail="Hospital inativo")
+
+    cache_set(
+        _hospital_cache_key(hospital_id),
+        {
+            "id": hospital.id,
+            "name": hospital.name,
+            "city": hospital.city,
+            "email": hospital.email,
+            "is_active": hospital.is_active,
+            "specialties": hospital.specialties,
+            "credentials": hospital.credentials,
+            "created_at": hospital.created_at.isoformat() if hospital.created_at else None,
+        },
+        ttl=settings.AUTH_CACHE_TTL,
+    )
     return hospital
 
@@ -0,0 +1,90 @@
+"""
+Cache Redis com TTL
+====================
+
+Cache simples para respostas de endpoints de estatísticas (dados que mudam
+lentamente). Se o Redis não estiver configurado (REDIS_URL vazio) ou estiver
+indisponível, todas as operações viram no-op e os endpoints seguem
+consultando o banco normalmente.
+"""
+
+import json
+from typing import Any, Optional
+
+from config import settings
+from logger import logger
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_client = None
+
+
+def get_redis():
+    """Retorna cliente Redis compartilhado, ou None se não configurado."""
+    global _client
+    if _client is None and redis and settings.REDIS_URL:
+        try:
+            _client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=2,
+                socket_connect_timeout=2,
+            )
+        except Exception as e:
+            logger.error(f"Erro ao conectar no Redis: {e}")
+            _client = None
+    return _client
+
+
+def cache_get(key: str) -> Optional[Any]:
+    """Busca valor no cache. Retorna None em caso de miss ou erro."""
+    client = get_redis()
+    if not client:
+        return None
+    try:
+        raw = client.get(f"{settings.CACHE_PREFIX}:{key}")
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.error(f"Erro ao ler cache ({key}): {e}")
+        return None
+
+
+def cache_set(key: str, value: Any, ttl: int = 60) -> None:
+    """Grava valor no cache com TTL em segundos."""
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.setex(f"{settings.CACHE_PREFIX}:{key}", ttl, json.dumps(value, default=str))
+    except Exception as e:
+        logger.error(f"Erro ao gravar cache ({key}): {e}")
+
+
+def cache_delete(*keys: str) -> None:
+    """Remove chaves do cache (invalidação explícita)."""
+    client = get_redis()
+    if not client:
+        return
+    try:
+        client.delete(*[f"{settings.CACHE_PREFIX}:{k}" for k in keys])
+    except Exception as e:
+        logger.error(f"Erro ao invalidar cache ({keys}): {e}")
+
+
+def cache_delete_prefix(prefix: str) -> None:
+    """
+    Remove todas as chaves com o prefixo dado (ex.: páginas de um
+    endpoint paginado, cujas chaves variam por limit/cursor). Usa SCAN
+    incremental — nunca KEYS, que bloqueia o Redis.
+    """
+    client = get_redis()
+    if not client:
+        return
+    try:
+        for key in client.scan_iter(match=f"{settings.CACHE_PREFIX}:{prefix}*"):
+            client.delete(key)
+    except Exception as e:
+        logger.error(f"Erro ao invalidar cache por prefixo ({prefix}): {e}")
@@ -1,20 +1,31 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./g4med.db"
+    # Criar tabelas no startup; desligar quando o schema for gerenciado
+    # por migrações externas
+    AUTO_CREATE_TABLES: bool = True
     
     # Security
     SECRET_KEY: str = "g4med-secret-key-change-in-production-2025"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 horas
+    BCRYPT_ROUNDS: int = 12  # usar 4 em dev/teste para acelerar auth
     
     # API
     API_TITLE: str = "G4med API"
     API_VERSION: str = "0.2.0"
     CORS_ORIGINS: List[str] = ["*"]
     
+    # Cache (Redis) - vazio desabilita o cache
+    REDIS_URL: str = ""
+    CACHE_PREFIX: str = "g4med"
+    STATS_CACHE_TTL: int = 120
+    INGEST_CACHE_TTL: int = 60
+    AUTH_CACHE_TTL: int = 120
+
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
@@ -27,9 +38,7 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 settings = Settings()
 
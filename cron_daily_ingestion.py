@@ -13,6 +13,7 @@ Ou via crontab -e:
 0 8 * * * /usr/bin/python3 /home/ubuntu/jurishealth-backend-ATUALIZADO/cron_daily_ingestion.py
 """
 
+import asyncio
 import sys
 import os
 from datetime import datetime
@@ -20,7 +21,7 @@ from datetime import datetime
 # Adicionar diretório do projeto ao path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from db import SessionLocal
+from db import ScopedSession
 from tasks import run_daily_ingestion
 from logger import logger
 
@@ -30,14 +31,16 @@ def main():
     logger.info(f"CRON JOB INICIADO - {datetime.now()}")
     logger.info("=" * 80)
     
-    db = SessionLocal()
-    
+    # Sessão com escopo de thread: se a ingestão fizer fan-out em threads,
+    # todas compartilham o pool do mesmo engine
+    db = ScopedSession()
+
     try:
-        result = run_daily_ingestion(db)
+        result = asyncio.run(run_daily_ingestion(db))
         
         if result["success"]:
-            logger.info(f"✅ SUCESSO: {result['casos_criados']} casos criados")
-            print(f"SUCCESS: {result['casos_criados']} casos criados")
+            logger.info(f"✅ SUCESSO: {result['cases_created']} casos criados")
+            print(f"SUCCESS: {result['cases_created']} casos criados")
             sys.exit(0)
         else:
             logger.error(f"❌ ERRO: {result.get('error', 'Erro desconhecido')}")
@@ -52,7 +55,7 @@ def main():
         sys.exit(1)
         
     finally:
-        db.close()
+        ScopedSession.remove()
         logger.info("=" * 80)
         logger.info(f"CRON JOB FINALIZADO - {datetime.now()}")
         logger.info("=" * 80)
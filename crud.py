@@ -1,11 +1,13 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy import select, func, update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict
 from datetime import date
 from fastapi import HTTPException
 import models
 import schemas
 from utils import normalize_string
+from cache import cache_delete
 from logger import log_bid_created, log_case_awarded, log_error
 
 def get_or_create_case(db: Session, data: schemas.CaseCreate) -> models.Case:
@@ -15,26 +17,22 @@ def get_or_create_case(db: Session, data: schemas.CaseCreate) -> models.Case:
         return existing
     
     case_data = data.model_dump()
-    # Adicionar campos normalizados
-    case_data['municipality_normalized'] = normalize_string(data.municipality)
-    case_data['procedure_normalized'] = normalize_string(data.procedure)
-    
+    # Campos normalizados: só recalcular se o chamador (adapter de
+    # ingestão) ainda não os preencheu
+    if not case_data.get('municipality_normalized'):
+        case_data['municipality_normalized'] = normalize_string(data.municipality)
+    if not case_data.get('procedure_normalized'):
+        case_data['procedure_normalized'] = normalize_string(data.procedure)
+
+
     obj = models.Case(**case_data)
     db.add(obj)
     db.commit()
     db.refresh(obj)
     return obj
 
-def list_opportunities(
-    db: Session,
-    city: Optional[str] = None,
-    procedure: Optional[str] = None,
-    status: Optional[str] = "open",
-    page: int = 1,
-    page_size: int = 20
-) -> Dict:
-    stmt = select(models.Case)
-    
+def _apply_opportunity_filters(stmt, city: Optional[str], procedure: Optional[str], status: Optional[str]):
+    """Aplica os filtros de oportunidades a um select qualquer (listagem, count...)."""
     if status:
         stmt = stmt.where(models.Case.status == status)
     if city:
@@ -43,16 +41,30 @@ def list_opportunities(
     if procedure:
         proc_norm = normalize_string(procedure)
         stmt = stmt.where(models.Case.procedure_normalized.like(f"%{proc_norm}%"))
-    
-    # Contar total
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = db.execute(count_stmt).scalar()
-    
+    return stmt
+
+def list_opportunities(
+    db: Session,
+    city: Optional[str] = None,
+    procedure: Optional[str] = None,
+    status: Optional[str] = "open",
+    page: int = 1,
+    page_size: int = 20
+) -> Dict:
+    # Total via window function na mesma query: evita o round-trip extra
+    # de um SELECT COUNT(*) separado com os mesmos filtros
+    stmt = _apply_opportunity_filters(
+        select(models.Case, func.count().over().label("total")),
+        city, procedure, status
+    )
+
     # Aplicar paginação
     offset = (page - 1) * page_size
-    stmt = stmt.offset(offset).limit(page_size).order_by(models.Case.created_at.desc())
-    
-    items = db.execute(stmt).scalars().all()
+    stmt = stmt.order_by(models.Case.created_at.desc()).offset(offset).limit(page_size)
+
+    rows = db.execute(stmt).all()
+    total = rows[0][1] if rows else 0
+    items = [row[0] for row in rows]
     
     return {
         "items": items,
@@ -71,56 +83,60 @@ def create_hospital(db: Session, data: schemas.HospitalCreate) -> models.Hospita
 
 def create_bid(db: Session, data: schemas.BidCreate) -> models.Bid:
     try:
-        # Verificar se o caso existe
-        case = db.get(models.Case, data.case_id)
-        if not case:
-            raise HTTPException(status_code=404, detail="Caso não encontrado")
-        
+        # Buscar caso e hospital em um único round-trip
+        row = db.execute(
+            select(models.Case, models.Hospital)
+            .join(models.Hospital, models.Hospital.id == data.hospital_id)
+            .where(models.Case.id == data.case_id)
+        ).first()
+
+        if row is None:
+            # Caminho de erro (raro): identificar qual entidade não existe
+            if not db.get(models.Case, data.case_id):
+                raise HTTPException(status_code=404, detail="Caso não encontrado")
+            raise HTTPException(status_code=404, detail="Hospital não encontrado")
+
+        case, hospital = row
+
         # Verificar status do caso
         if case.status not in ["open", "in_bid"]:
             raise HTTPException(
                 status_code=400,
                 detail=f"Caso não está disponível para orçamentos (status: {case.status})"
             )
-        
+
         # Verificar prazo judicial
         if case.due_date and case.due_date < date.today():
             raise HTTPException(
                 status_code=400,
                 detail="Prazo judicial já expirado. Não é possível enviar orçamento."
             )
-        
-        # Verificar se hospital já enviou orçamento
-        existing_bid = db.query(models.Bid).filter(
-            models.Bid.case_id == data.case_id,
-            models.Bid.hospital_id == data.hospital_id
-        ).first()
-        
-        if existing_bid:
-            raise HTTPException(
-                status_code=400,
-                detail="Hospital já enviou orçamento para este caso"
-            )
-        
-        # Verificar se hospital existe
-        hospital = db.get(models.Hospital, data.hospital_id)
-        if not hospital:
-            raise HTTPException(status_code=404, detail="Hospital não encontrado")
-        
-        # Criar bid
+
+        # Criar bid; a constraint uq_bid_case_hospital detecta duplicata
+        # no próprio INSERT, dispensando o SELECT de pré-verificação
         obj = models.Bid(**data.model_dump())
         db.add(obj)
-        
+
         # Atualizar status do caso
         if case.status == "open":
             case.status = "in_bid"
-        
-        db.commit()
+
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Hospital já enviou orçamento para este caso"
+            )
         db.refresh(obj)
         
         # Log
         log_bid_created(obj.case_id, obj.hospital_id, obj.amount)
-        
+
+        # Invalidar cache de estatísticas
+        cache_delete("stats:platform")
+
         return obj
     except HTTPException:
         raise
@@ -140,9 +156,13 @@ def award_case(db: Session, case_id: int, winning_bid_id: int, payer_entity: str
         if bid.case_id != case_id:
             raise HTTPException(status_code=400, detail="Orçamento não pertence a este caso")
         
-        # Atualizar status de todos os bids
-        for b in case.bids:
-            b.status = "lost"
+        # Atualizar status dos bids perdedores em um único UPDATE
+        # (evita lazy-load da coleção + um UPDATE por linha)
+        db.execute(
+            update(models.Bid)
+            .where(models.Bid.case_id == case_id, models.Bid.id != winning_bid_id)
+            .values(status="lost")
+        )
         bid.status = "won"
         
         # Criar award
@@ -161,7 +181,10 @@ def award_case(db: Session, case_id: int, winning_bid_id: int, payer_entity: str
         
         # Log
         log_case_awarded(case_id, award.hospital_id, award.amount)
-        
+
+        # Invalidar cache de estatísticas
+        cache_delete("stats:platform")
+
         return award
     except HTTPException:
         raise
@@ -172,6 +195,22 @@ def award_case(db: Session, case_id: int, winning_bid_id: int, payer_entity: str
 def get_case(db: Session, case_id: int) -> models.Case:
     return db.get(models.Case, case_id)
 
+def get_case_with_children(db: Session, case_id: int) -> Optional[models.Case]:
+    """
+    Caso com bids e award carregados explicitamente; qualquer outro
+    relacionamento acessado por engano levanta erro em vez de disparar
+    uma query implícita (N+1 silencioso).
+    """
+    return db.execute(
+        select(models.Case)
+        .where(models.Case.id == case_id)
+        .options(
+            selectinload(models.Case.bids),
+            selectinload(models.Case.award),
+            raiseload("*")
+        )
+    ).scalar_one_or_none()
+
 def get_hospital_bids(db: Session, hospital_id: int, status: Optional[str] = None) -> List[models.Bid]:
     query = db.query(models.Bid).filter(models.Bid.hospital_id == hospital_id)
     if status:
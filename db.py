@@ -1,12 +1,39 @@
 import os
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
+from sqlalchemy.pool import StaticPool
 from dotenv import load_dotenv
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./g4med.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite (dev): uma conexão compartilhada entre threads
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+else:
+    # Postgres (prod): pool dimensionado para multiplexar conexões entre
+    # requests, com pre-ping (descarta conexões mortas) e recycle horário
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        future=True,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+    )
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+
+# Sessão com escopo por thread para processos batch (cron/ingestão): threads
+# compartilham o pool do mesmo engine e cada uma recebe sua própria sessão
+ScopedSession = scoped_session(SessionLocal)
+
 Base = declarative_base()
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, UniqueConstraint, Boolean, Index, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, UniqueConstraint, Boolean, Index, Text, DDL, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import datetime, timezone
 from db import Base
 
+# No Postgres, JSON vira json (texto reparseado a cada leitura); JSONB é
+# binário, com operadores mais rápidos e indexável por GIN. No SQLite (dev)
+# segue o JSON comum.
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
 class Case(Base):
     __tablename__ = "cases"
     id = Column(Integer, primary_key=True, index=True)
@@ -18,9 +24,17 @@ class Case(Base):
     value_estimate = Column(Float, nullable=True)
     status = Column(String, index=True, default="open")
     due_date = Column(Date, nullable=True)
-    meta = Column(JSON, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    meta = Column(JSONVariant, nullable=True)
+    # server_default cobre tabelas novas (create_all); o default Python
+    # permanece porque não há migrations — tabelas já implantadas não
+    # ganham o DEFAULT do servidor e ficariam com created_at NULL.
+    # Sempre aware: datetime naive em coluna timestamptz é interpretado
+    # no fuso da sessão e deslocaria o horário fora de UTC
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
 
+    # lazy padrão: a maioria dos acessos a Case (listagens, create_bid,
+    # award_case) não toca nas coleções. Quem precisa delas carrega com
+    # selectinload explícito (ver crud.get_case_with_children).
     bids = relationship("Bid", back_populates="case", cascade="all, delete-orphan")
     award = relationship("Award", back_populates="case", uselist=False, cascade="all, delete-orphan")
     
@@ -28,8 +42,31 @@ class Case(Base):
         Index('ix_case_status_municipality', 'status', 'municipality_normalized'),
         Index('ix_case_status_procedure', 'status', 'procedure_normalized'),
         Index('ix_case_due_date_status', 'due_date', 'status'),
+        Index('ix_case_status_created', 'status', 'created_at'),
     )
 
+# Índices trigram (pg_trgm) para os filtros LIKE '%...%' de list_opportunities:
+# B-tree não atende predicado com curinga à esquerda, então sem eles a busca
+# vira sequential scan. Apenas Postgres; no SQLite (dev) o LIKE segue sem índice.
+event.listen(
+    Case.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+event.listen(
+    Case.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_case_mun_trgm ON cases "
+        "USING gin (municipality_normalized gin_trgm_ops)"
+    ).execute_if(dialect="postgresql")
+)
+event.listen(
+    Case.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_case_proc_trgm ON cases "
+        "USING gin (procedure_normalized gin_trgm_ops)"
+    ).execute_if(dialect="postgresql")
+)
+
 class Hospital(Base):
     __tablename__ = "hospitals"
     id = Column(Integer, primary_key=True, index=True)
@@ -38,12 +75,21 @@ class Hospital(Base):
     email = Column(String, unique=True, index=True, nullable=True)  # NOVO
     password_hash = Column(String, nullable=True)  # NOVO
     is_active = Column(Boolean, default=True)  # NOVO
-    specialties = Column(JSON, default=list)
-    credentials = Column(JSON, default=list)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    specialties = Column(JSONVariant, default=list)
+    credentials = Column(JSONVariant, default=list)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
 
     bids = relationship("Bid", back_populates="hospital", cascade="all, delete-orphan")
 
+# GIN sobre specialties: consultas de matching por containment (@>) sem scan
+event.listen(
+    Hospital.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_hospital_specialties_gin "
+        "ON hospitals USING gin (specialties)"
+    ).execute_if(dialect="postgresql")
+)
+
 class Bid(Base):
     __tablename__ = "bids"
     id = Column(Integer, primary_key=True, index=True)
@@ -52,7 +98,7 @@ class Bid(Base):
     amount = Column(Float)
     notes = Column(String, nullable=True)
     status = Column(String, index=True, default="submitted")
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
 
     case = relationship("Case", back_populates="bids")
     hospital = relationship("Hospital", back_populates="bids")
@@ -71,7 +117,7 @@ class Award(Base):
     amount = Column(Float)
     payer_entity = Column(String)
     award_notes = Column(String, nullable=True)
-    awarded_at = Column(DateTime, default=datetime.utcnow)
+    awarded_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
 
     case = relationship("Case", back_populates="award")
 
@@ -104,7 +150,7 @@ class IngestionLog(Base):
     error_traceback = Column(Text, nullable=True)
     
     # Metadados
-    meta = Column(JSON, nullable=True)
+    meta = Column(JSONVariant, nullable=True)
     
     # Tipo de execução
     execution_type = Column(String, nullable=False, default="manual", index=True)  # "manual", "cron", "api"
@@ -114,3 +160,15 @@ class IngestionLog(Base):
         Index('ix_ingestion_log_execution_type', 'execution_type', 'started_at'),
     )
 
+# Índice parcial cobrindo as consultas de estatísticas (success IS TRUE):
+# INCLUDE (cases_created) permite index-only scan no SUM. Apenas Postgres;
+# no SQLite as consultas usam os índices comuns acima.
+event.listen(
+    IngestionLog.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_ingestion_log_success_started "
+        "ON ingestion_logs (started_at DESC) INCLUDE (cases_created) "
+        "WHERE success IS TRUE"
+    ).execute_if(dialect="postgresql")
+)
+
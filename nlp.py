@@ -1,10 +1,28 @@
 # Regras simples para normalizar campos (sem deps pesadas).
 from typing import Dict
 
+from utils import normalize_string
+
+# Caches de formatação: os mesmos municípios/procedimentos se repetem muito
+# na ingestão em lote, então cada string única paga strip/title/capitalize
+# uma só vez e depois vira um hit de dict
+_TITLE_CACHE: Dict[str, str] = {}
+_CAP_CACHE: Dict[str, str] = {}
+
 def normalize_case_fields(data: Dict) -> Dict:
     data = dict(data)
-    if 'municipality' in data and isinstance(data['municipality'], str):
-        data['municipality'] = data['municipality'].strip().title()
-    if 'procedure' in data and isinstance(data['procedure'], str):
-        data['procedure'] = data['procedure'].strip().capitalize()
+    municipality = data.get('municipality')
+    if isinstance(municipality, str):
+        data['municipality'] = _TITLE_CACHE.setdefault(
+            municipality, municipality.strip().title()
+        )
+        # Preencher a coluna normalizada aqui evita re-normalização por
+        # linha no caminho de insert em lote (normalize_string tem LRU)
+        data['municipality_normalized'] = normalize_string(data['municipality'])
+    procedure = data.get('procedure')
+    if isinstance(procedure, str):
+        data['procedure'] = _CAP_CACHE.setdefault(
+            procedure, procedure.strip().capitalize()
+        )
+        data['procedure_normalized'] = normalize_string(data['procedure'])
     return data
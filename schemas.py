@@ -1,7 +1,17 @@
-from pydantic import BaseModel, Field, field_validator, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, field_validator, EmailStr
 from typing import Optional, List, Any, Generic, TypeVar
 from datetime import date, datetime
 
+def to_out(schema, orm_obj):
+    """
+    Converte objeto ORM em schema Out sem validação: os dados já vieram
+    tipados do banco, então model_construct dispensa o dispatch de
+    validadores do Pydantic (relevante em endpoints de listagem).
+    """
+    return schema.model_construct(
+        **{f: getattr(orm_obj, f) for f in schema.model_fields}
+    )
+
 # Schemas de Case
 class CaseCreate(BaseModel):
     court: str = "TJMG"
@@ -10,6 +20,9 @@ class CaseCreate(BaseModel):
     patient_hash: str
     procedure: str
     municipality: str
+    # Preenchidos pelo adapter/normalizador; se ausentes, o crud normaliza
+    procedure_normalized: Optional[str] = None
+    municipality_normalized: Optional[str] = None
     value_estimate: Optional[float] = None
     status: str = "open"
     due_date: Optional[date] = None
@@ -34,9 +47,8 @@ class CaseOut(BaseModel):
     due_date: Optional[date]
     meta: Optional[dict]
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # Schemas de Hospital
 class HospitalCreate(BaseModel):
@@ -66,9 +78,8 @@ class HospitalOut(BaseModel):
     specialties: List[str]
     credentials: List[str]
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 class TokenResponse(BaseModel):
     access_token: str
@@ -99,9 +110,8 @@ class BidOut(BaseModel):
     notes: Optional[str]
     status: str
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # Schemas de Award
 class AwardCreate(BaseModel):
@@ -117,9 +127,8 @@ class AwardOut(BaseModel):
     payer_entity: str
     award_notes: Optional[str]
     awarded_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # Schema de Paginação
 T = TypeVar('T')
@@ -5,17 +5,22 @@ Tasks com Sistema de Retry Automático
 Sistema robusto de ingestão com retry automático até conseguir executar com sucesso.
 """
 
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy import case as sql_case, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, defer, load_only
+from datetime import date, datetime, timezone
+from db import SessionLocal
+from pydantic import TypeAdapter, ValidationError
 from schemas import CaseCreate
 from tjmg_adapter import TJMGAdapterMock
 from tjmg_adapter_real import TJMGAdapterReal
 from nlp import normalize_case_fields
-import crud
 import models
+from utils import normalize_string
+from cache import cache_delete, cache_delete_prefix
 from logger import logger
+import asyncio
 import os
-import time
 import traceback
 
 
@@ -66,51 +71,88 @@ def update_ingestion_log(
     
     if meta:
         log.meta = meta
-    
+
     db.commit()
     db.refresh(log)
 
+    # Invalidar caches afetados pela ingestão; o histórico tem uma chave
+    # por combinação limit/cursor, então sai por prefixo
+    cache_delete("ingest:stats", "stats:platform")
+    cache_delete_prefix("ingest:history:")
+
+
+async def run_tjmg_ingestion_job(
+    log_id: int,
+    n: int = 10,
+    use_real: bool = False,
+    execution_type: str = "api",
+    max_attempts: int = 3
+) -> dict:
+    """
+    Executa ingestão em background (FastAPI BackgroundTasks).
+
+    Abre sessão própria — nunca reutiliza a sessão da request, que já
+    foi fechada quando a task roda.
+    """
+    db = SessionLocal()
+    try:
+        log = db.get(models.IngestionLog, log_id)
+        return await run_tjmg_ingestion_with_retry(
+            db,
+            n=n,
+            use_real=use_real,
+            execution_type=execution_type,
+            max_attempts=max_attempts,
+            log=log
+        )
+    finally:
+        db.close()
+
 
-def run_tjmg_ingestion_with_retry(
+async def run_tjmg_ingestion_with_retry(
     db: Session,
     n: int = 10,
     use_real: bool = False,
     execution_type: str = "manual",
-    max_attempts: int = 3
+    max_attempts: int = 3,
+    log: models.IngestionLog = None
 ) -> dict:
     """
     Executa ingestão com sistema de retry automático.
-    
+
     Tenta executar até conseguir sucesso ou atingir número máximo de tentativas.
-    
+
     Args:
         db: Sessão do banco de dados
         n: Número de processos a capturar
         use_real: Se True, usa adapter real (Selenium)
         execution_type: Tipo de execução ("manual", "cron", "api")
         max_attempts: Número máximo de tentativas
-    
+        log: Log pré-criado (execução em background); se None, cria um novo
+
     Returns:
         Dicionário com resultado final
     """
     mode = "real" if use_real else "mock"
-    
+
     logger.info("=" * 80)
     logger.info(f"INGESTÃO INICIADA: mode={mode}, n={n}, max_attempts={max_attempts}")
     logger.info("=" * 80)
-    
-    # Criar log inicial
-    log = create_ingestion_log(db, mode, n, execution_type, max_attempts)
+
+    # Criar log inicial (a menos que o chamador já tenha criado)
+    if log is None:
+        log = create_ingestion_log(db, mode, n, execution_type, max_attempts)
     
     for attempt in range(1, max_attempts + 1):
+        # Só em memória: o valor é persistido junto com o commit final do
+        # update_ingestion_log, poupando um fsync por tentativa
         log.attempt_number = attempt
-        db.commit()
-        
+
         logger.info(f"Tentativa {attempt}/{max_attempts}")
         
         try:
-            # Executar ingestão
-            result = _execute_ingestion(db, n, use_real)
+            # Executar ingestão (síncrona/Selenium) fora do event loop
+            result = await asyncio.to_thread(_execute_ingestion, db, n, use_real)
             
             # Verificar se teve sucesso
             if result["success"]:
@@ -148,7 +190,7 @@ def run_tjmg_ingestion_with_retry(
                 # Backoff exponencial: 10s, 30s, 60s
                 wait_time = min(10 * (2 ** (attempt - 1)), 60)
                 logger.info(f"Aguardando {wait_time}s antes da próxima tentativa...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
             else:
                 # Última tentativa falhou
                 logger.error(f"❌ FALHA FINAL após {max_attempts} tentativas")
@@ -176,6 +218,137 @@ def run_tjmg_ingestion_with_retry(
     }
 
 
+# A partir deste volume o COPY do Postgres ganha do executemany
+# (elimina parse/plan por linha)
+_COPY_MIN_ROWS = 500
+
+_COPY_COLUMNS = (
+    "court", "jurisdiction", "case_number", "patient_hash",
+    "procedure", "procedure_normalized", "municipality", "municipality_normalized",
+    "value_estimate", "status", "due_date", "meta", "created_at"
+)
+
+
+def _copy_insert_cases(db: Session, rows: list) -> int:
+    """
+    Caminho COPY FROM (apenas Postgres): escreve o lote num buffer
+    tab-separado, faz COPY para uma TEMP TABLE e resolve duplicatas com
+    INSERT ... ON CONFLICT DO NOTHING.
+
+    Returns:
+        Número de casos efetivamente criados
+    """
+    import io
+    import json
+
+    # Um único timestamp para o lote inteiro: o COPY não passa pelos
+    # defaults do ORM, e tabelas implantadas antes do server_default
+    # deixariam created_at NULL. Aware (+00): texto naive em timestamptz
+    # seria interpretado no fuso da sessão
+    created_at = datetime.now(timezone.utc).isoformat(sep=" ")
+    buf = io.StringIO()
+    for r in rows:
+        values = []
+        for col in _COPY_COLUMNS:
+            v = created_at if col == "created_at" else r.get(col)
+            if v is None:
+                values.append("\\N")
+                continue
+            if col == "meta":
+                v = json.dumps(v, ensure_ascii=False, default=str)
+            values.append(
+                str(v).replace("\\", "\\\\").replace("\t", "\\t")
+                      .replace("\n", "\\n").replace("\r", "\\r")
+            )
+        buf.write("\t".join(values) + "\n")
+    buf.seek(0)
+
+    cols = ", ".join(_COPY_COLUMNS)
+    cursor = db.connection().connection.cursor()
+    cursor.execute(
+        "CREATE TEMP TABLE tmp_cases (LIKE cases INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    cursor.copy_expert(f"COPY tmp_cases ({cols}) FROM STDIN", buf)
+    cursor.execute(
+        f"INSERT INTO cases ({cols}) SELECT {cols} FROM tmp_cases "
+        "ON CONFLICT (case_number) DO NOTHING"
+    )
+    inserted = cursor.rowcount
+    db.commit()
+    return inserted
+
+
+def _bulk_insert_cases(db: Session, rows: list) -> int:
+    """
+    Insere os casos em lote: um SELECT único para deduplicar por
+    case_number e um INSERT executemany, em vez de SELECT+INSERT+commit
+    por linha (o gargalo da ingestão são os round-trips de banco).
+
+    Returns:
+        Número de casos efetivamente criados
+    """
+    if not rows:
+        return 0
+
+    # Deduplicar contra o banco (e dentro do próprio lote) em 1 round-trip
+    nums = [r["case_number"] for r in rows]
+    existing = {
+        num for (num,) in db.execute(
+            select(models.Case.case_number).where(models.Case.case_number.in_(nums))
+        )
+    }
+
+    to_insert = []
+    for r in rows:
+        num = r["case_number"]
+        if num in existing:
+            continue
+        existing.add(num)
+        # Garantir colunas normalizadas quando o adapter não preencheu
+        if not r.get("municipality_normalized"):
+            r["municipality_normalized"] = normalize_string(r["municipality"])
+        if not r.get("procedure_normalized"):
+            r["procedure_normalized"] = normalize_string(r["procedure"])
+        to_insert.append(r)
+
+    if not to_insert:
+        return 0
+
+    try:
+        # Lotes grandes no Postgres: COPY é ~1 ordem de grandeza mais
+        # rápido que executemany
+        if db.get_bind().dialect.name == "postgresql" and len(to_insert) >= _COPY_MIN_ROWS:
+            return _copy_insert_cases(db, to_insert)
+
+        db.execute(insert(models.Case), to_insert)
+        db.commit()
+        return len(to_insert)
+    except Exception as e:
+        # Fallback linha a linha para isolar o registro problemático
+        # (ex.: corrida com outra ingestão violando o UNIQUE)
+        db.rollback()
+        logger.error(f"Insert em lote falhou, usando fallback por linha: {e}")
+        count = 0
+        for r in to_insert:
+            try:
+                # Linhas já validadas e deduplicadas contra o set; o UNIQUE
+                # de case_number resolve corridas sem SELECT de pré-checagem
+                db.execute(insert(models.Case).values(**r))
+                db.commit()
+                count += 1
+            except IntegrityError:
+                db.rollback()
+            except Exception as e:
+                logger.error(f"Erro ao criar caso {r.get('case_number')}: {e}")
+                db.rollback()
+        return count
+
+
+# Validação em lote: uma chamada amortiza o overhead por __init__ de
+# validar N linhas uma a uma
+_CASE_LIST_ADAPTER = TypeAdapter(list[CaseCreate])
+
+
 def _execute_ingestion(db: Session, n: int, use_real: bool) -> dict:
     """
     Executa ingestão (função interna).
@@ -195,20 +368,40 @@ def _execute_ingestion(db: Session, n: int, use_real: bool) -> dict:
         cases = adapter.fetch_cases()
         cases_found = len(cases)
         logger.info(f"Capturados {cases_found} processos")
-        
-        # Salvar no banco
-        count = 0
+
+        # Normalizar cada caso; a validação Pydantic acontece depois, em
+        # lote, via _CASE_LIST_ADAPTER (uma chamada para N linhas em vez
+        # de um CaseCreate(...) por caso)
+        today = date.today()
+        normalized = []
         for c in cases:
             try:
                 c_norm = normalize_case_fields(c)
-                obj = crud.get_or_create_case(db, CaseCreate(**c_norm))
-                if obj:
-                    count += 1
-                    logger.info(f"Caso criado: {c_norm.get('case_number')}")
+                # Prazo expirado sai antes da validação em lote (o validator
+                # de CaseCreate rejeitaria o lote inteiro)
+                due = c_norm.get("due_date")
+                if due and due < today:
+                    logger.info(f"Caso {c_norm.get('case_number')} descartado: prazo expirado")
+                    continue
+                normalized.append(c_norm)
             except Exception as e:
-                logger.error(f"Erro ao criar caso: {e}")
+                logger.error(f"Erro ao normalizar caso: {e}")
                 continue
-        
+
+        # Validar o lote inteiro em uma chamada; se algum caso for
+        # inválido, refazer linha a linha para isolar o índice ofensor
+        try:
+            rows = [m.model_dump() for m in _CASE_LIST_ADAPTER.validate_python(normalized)]
+        except ValidationError:
+            rows = []
+            for i, c_norm in enumerate(normalized):
+                try:
+                    rows.append(CaseCreate(**c_norm).model_dump())
+                except ValidationError as e:
+                    logger.error(f"Caso inválido no índice {i}: {e}")
+
+        count = _bulk_insert_cases(db, rows)
+
         logger.info(f"Ingestão concluída: {count} casos criados de {cases_found} encontrados")
         
         return {
@@ -231,7 +424,7 @@ def _execute_ingestion(db: Session, n: int, use_real: bool) -> dict:
         }
 
 
-def run_daily_ingestion(db: Session) -> dict:
+async def run_daily_ingestion(db: Session) -> dict:
     """
     Executa ingestão diária automática com retry.
     
@@ -249,7 +442,7 @@ def run_daily_ingestion(db: Session) -> dict:
     logger.info(f"Configuração: use_real={use_real}, max_processos={max_processos}, max_attempts={max_attempts}")
     
     # Executar com retry
-    result = run_tjmg_ingestion_with_retry(
+    result = await run_tjmg_ingestion_with_retry(
         db,
         n=max_processos,
         use_real=use_real,
@@ -265,6 +458,22 @@ def run_daily_ingestion(db: Session) -> dict:
     return result
 
 
+# Colunas realmente serializadas nas listagens: deixa error_traceback e
+# meta (potencialmente grandes) fora do SELECT
+_LOG_LIST_COLUMNS = (
+    models.IngestionLog.started_at,
+    models.IngestionLog.finished_at,
+    models.IngestionLog.duration_seconds,
+    models.IngestionLog.mode,
+    models.IngestionLog.execution_type,
+    models.IngestionLog.success,
+    models.IngestionLog.cases_found,
+    models.IngestionLog.cases_created,
+    models.IngestionLog.attempt_number,
+    models.IngestionLog.error_message,
+)
+
+
 def get_last_ingestion_status(db: Session) -> dict:
     """
     Retorna status da última execução do robô.
@@ -272,7 +481,11 @@ def get_last_ingestion_status(db: Session) -> dict:
     Returns:
         Dicionário com informações da última execução
     """
-    last_log = db.query(models.IngestionLog).order_by(
+    # error_traceback (TEXT potencialmente grande) fica fora do SELECT;
+    # o status serializa meta e max_attempts, então o resto é carregado
+    last_log = db.query(models.IngestionLog).options(
+        defer(models.IngestionLog.error_traceback)
+    ).order_by(
         models.IngestionLog.started_at.desc()
     ).first()
     
@@ -299,21 +512,34 @@ def get_last_ingestion_status(db: Session) -> dict:
     }
 
 
-def get_ingestion_history(db: Session, limit: int = 10) -> list:
+def get_ingestion_history(db: Session, limit: int = 10, before: int = None) -> dict:
     """
-    Retorna histórico de execuções.
-    
+    Retorna histórico de execuções com paginação por keyset.
+
+    OFFSET degrada linearmente com a profundidade da página; o cursor
+    custa O(log n) em qualquer página. O cursor é o id (PK monotônica):
+    started_at tem resolução de segundos e empata entre execuções
+    próximas, o que faria o keyset pular ou repetir linhas — para um log
+    append-only a ordenação por id é equivalente.
+
     Args:
         limit: Número máximo de registros
-    
+        before: Cursor — retorna execuções com log_id menor que este
+
     Returns:
-        Lista de execuções
+        Dicionário com a lista de execuções e o cursor da próxima página
     """
-    logs = db.query(models.IngestionLog).order_by(
-        models.IngestionLog.started_at.desc()
-    ).limit(limit).all()
-    
-    return [
+    stmt = (
+        select(models.IngestionLog)
+        .options(load_only(*_LOG_LIST_COLUMNS))
+        .order_by(models.IngestionLog.id.desc())
+        .limit(limit)
+    )
+    if before is not None:
+        stmt = stmt.where(models.IngestionLog.id < before)
+    logs = db.execute(stmt).scalars().all()
+
+    items = [
         {
             "log_id": log.id,
             "started_at": log.started_at.isoformat(),
@@ -329,6 +555,11 @@ def get_ingestion_history(db: Session, limit: int = 10) -> list:
         }
         for log in logs
     ]
+    return {
+        "items": items,
+        # Cursor para a próxima página (passar como ?before=...)
+        "next_cursor": logs[-1].id if len(logs) == limit else None
+    }
 
 
 def get_ingestion_stats(db: Session) -> dict:
@@ -338,32 +569,39 @@ def get_ingestion_stats(db: Session) -> dict:
     Returns:
         Dicionário com estatísticas
     """
-    total_executions = db.query(models.IngestionLog).count()
-    successful_executions = db.query(models.IngestionLog).filter(
-        models.IngestionLog.success == True
-    ).count()
-    
-    total_cases_created = db.query(
-        models.IngestionLog.cases_created
-    ).filter(
-        models.IngestionLog.success == True
-    ).all()
-    
-    total_cases = sum([log.cases_created for log in total_cases_created])
-    
-    # Última execução bem-sucedida
-    last_success = db.query(models.IngestionLog).filter(
-        models.IngestionLog.success == True
-    ).order_by(
-        models.IngestionLog.started_at.desc()
-    ).first()
-    
+    # Uma única passada na tabela com agregação condicional, em vez de
+    # 4 round-trips (COUNT, COUNT filtrado, SUM e MAX separados)
+    row = db.execute(
+        select(
+            func.count().label("total"),
+            func.coalesce(
+                func.sum(sql_case((models.IngestionLog.success, 1), else_=0)), 0
+            ).label("succ"),
+            func.coalesce(
+                func.sum(
+                    sql_case(
+                        (models.IngestionLog.success, models.IngestionLog.cases_created),
+                        else_=0
+                    )
+                ), 0
+            ).label("cases"),
+            func.max(
+                sql_case((models.IngestionLog.success, models.IngestionLog.started_at))
+            ).label("last_ok"),
+        )
+    ).one()
+
+    total_executions, successful_executions, total_cases, last_ok = row
+
+    if last_ok is not None and not isinstance(last_ok, str):
+        last_ok = last_ok.isoformat()
+
     return {
         "total_executions": total_executions,
         "successful_executions": successful_executions,
         "failed_executions": total_executions - successful_executions,
         "success_rate": round((successful_executions / total_executions * 100), 2) if total_executions > 0 else 0,
         "total_cases_created": total_cases,
-        "last_successful_execution": last_success.started_at.isoformat() if last_success else None
+        "last_successful_execution": last_ok
     }
 
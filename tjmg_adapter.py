@@ -1,8 +1,18 @@
 from datetime import date, timedelta
-import random, hashlib
+from functools import lru_cache
+import hashlib
+import sys
+
+import numpy as np
 
 from adapter_base import CourtAdapter
 
+
+@lru_cache(maxsize=4096)
+def _patient_hash(i: int) -> str:
+    """Hash determinístico do paciente mock i; memoizado entre execuções."""
+    return hashlib.sha256(f"paciente_{i}".encode()).hexdigest()[:16]
+
 PROCEDURES = [
     "Cirurgia oncológica", "Radioterapia IMRT", "Cateterismo", "Prótese de quadril",
     "Hemodiálise", "Medicação de alto custo", "Quimioterapia"
@@ -13,6 +23,13 @@ CITIES_MG = [
     "Patos de Minas","Teófilo Otoni","Sabará"
 ]
 
+# Valores idênticos em todas as linhas: uma única alocação compartilhada
+# em vez de n dicts/strings novos por fetch (ninguém muta esses campos)
+_MOCK_META = {"stage": "transitado_em_julgado", "source": "mock_tjmg"}
+_COURT = sys.intern("TJMG")
+_JURISDICTION = sys.intern("Saúde")
+_STATUS_OPEN = sys.intern("open")
+
 class TJMGAdapterMock(CourtAdapter):
     """Adapter MOCK para desenvolvimento.
 
@@ -22,25 +39,36 @@ class TJMGAdapterMock(CourtAdapter):
         self.n = n
 
     def fetch_cases(self):
-        out = []
+        n = self.n
         base_today = date.today()
-        for i in range(self.n):
-            proc = random.choice(PROCEDURES)
-            city = random.choice(CITIES_MG)
-            case_number = f"500{base_today.year}{i:04d}-{random.randint(10,99)}.2025.8.13.0000"
-            patient_hash = hashlib.sha256(f"paciente_{i}".encode()).hexdigest()[:16]
-            due = base_today + timedelta(days=random.randint(10, 90))
-            value = round(random.uniform(5000, 80000), 2)
+
+        # Sorteios vetorizados com NumPy: um único pedido ao gerador por
+        # campo, em vez de n chamadas a random.choice/uniform/randint
+        rng = np.random.default_rng()
+        proc_idx = rng.integers(0, len(PROCEDURES), n).tolist()
+        city_idx = rng.integers(0, len(CITIES_MG), n).tolist()
+        suffixes = rng.integers(10, 100, n).tolist()
+        days = rng.integers(10, 91, n).tolist()
+        values = np.round(rng.uniform(5000, 80000, n), 2).tolist()
+
+        out = []
+        for i in range(n):
+            proc = PROCEDURES[proc_idx[i]]
+            city = CITIES_MG[city_idx[i]]
+            case_number = f"500{base_today.year}{i:04d}-{suffixes[i]}.2025.8.13.0000"
+            patient_hash = _patient_hash(i)
+            due = base_today + timedelta(days=days[i])
+            value = values[i]
             out.append({
-                "court": "TJMG",
-                "jurisdiction": "Saúde",
+                "court": _COURT,
+                "jurisdiction": _JURISDICTION,
                 "case_number": case_number,
                 "patient_hash": patient_hash,
                 "procedure": proc,
                 "municipality": city,
                 "value_estimate": value,
-                "status": "open",
+                "status": _STATUS_OPEN,
                 "due_date": due,
-                "meta": {"stage": "transitado_em_julgado", "source": "mock_tjmg"}
+                "meta": _MOCK_META
             })
         return out
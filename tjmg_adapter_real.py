@@ -12,15 +12,15 @@ Estratégia validada:
 - Classificar urgência
 """
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
+# Selenium é importado dentro das funções que o usam: custa ~100ms+ no
+# import e só é necessário no fallback do scraping — quem importa o
+# módulo (API, ingestão mock) não paga esse custo
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+import queue
 import re
+
+import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import hashlib
@@ -31,32 +31,71 @@ from logger import logger
 # Configurações
 PJE_URL = "https://pje-consulta-publica.tjmg.jus.br/"
 
+# Regexes do loop por processo compiladas no import: o search do objeto
+# compilado dispensa a sondagem do cache interno do re a cada chamada
+_RE_NUMERO = re.compile(r'(\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4})')
+_RE_COMARCA = re.compile(r'Comarca[:\s]+([A-Za-zÀ-ÿ\s]+)', re.IGNORECASE)
+
+# XPath dos links de resultado, usado na espera pelos resultados
+_XPATH_RESULT_LINKS = "//a[contains(@href, 'DetalheProcessoConsultaPublica')]"
+
+# Cabeçalho do caminho HTTP (sem navegador)
+_HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    )
+}
+
+# Extração em lote no navegador: um único round-trip CDP devolve
+# [texto, href] de todos os links, em vez de 2 RPCs por link
+_JS_EXTRACT_LINKS = (
+    "return Array.from("
+    "document.querySelectorAll(\"a[href*='DetalheProcessoConsultaPublica']\")"
+    ").slice(0, arguments[0]).map(a => [a.innerText, a.href]);"
+)
+
 # Termos para buscar (réus em processos de saúde)
-TERMOS_BUSCA = [
+TERMOS_BUSCA = (
     "Secretaria de Saúde",
     "Secretaria Municipal de Saúde",
     "Secretaria Estadual de Saúde",
-]
+)
 
 # Palavras-chave que indicam sentença favorável
-PALAVRAS_SENTENCA_FAVORAVEL = [
+PALAVRAS_SENTENCA_FAVORAVEL = (
     "concedo", "defiro", "determino", "obrigação de fazer",
     "fornecimento", "procedente", "acolho", "julgo procedente",
     "condeno", "deverá fornecer", "deverá realizar"
-]
+)
 
 # Tipos de procedimentos
 TIPOS_PROCEDIMENTOS = {
-    "cirurgia": ["cirurgia", "cirúrgico", "procedimento cirúrgico", "operação"],
-    "medicamento": ["medicamento", "remédio", "fármaco", "fornecimento de medicamento"],
-    "internacao": ["internação", "internacao", "leito", "vaga hospitalar"],
-    "uti": ["uti", "unidade de terapia intensiva", "cti"],
-    "quimioterapia": ["quimio", "quimioterapia", "oncologia", "câncer", "cancer"],
-    "radioterapia": ["radio", "radioterapia"],
-    "exame": ["exame", "diagnóstico", "ressonância", "tomografia"],
-    "tratamento": ["tratamento", "terapia", "sessões"],
+    "cirurgia": ("cirurgia", "cirúrgico", "procedimento cirúrgico", "operação"),
+    "medicamento": ("medicamento", "remédio", "fármaco", "fornecimento de medicamento"),
+    "internacao": ("internação", "internacao", "leito", "vaga hospitalar"),
+    "uti": ("uti", "unidade de terapia intensiva", "cti"),
+    "quimioterapia": ("quimio", "quimioterapia", "oncologia", "câncer", "cancer"),
+    "radioterapia": ("radio", "radioterapia"),
+    "exame": ("exame", "diagnóstico", "ressonância", "tomografia"),
+    "tratamento": ("tratamento", "terapia", "sessões"),
 }
 
+# Classificador em regex única com grupos nomeados: uma invocação do
+# engine C por documento, independente do número de categorias;
+# match.lastgroup identifica a categoria. IGNORECASE dispensa alocar
+# uma cópia .lower() do texto inteiro
+_CLASSIFIER_RE = re.compile(
+    "|".join(
+        f"(?P<{tipo}>" + "|".join(re.escape(p) for p in palavras) + ")"
+        for tipo, palavras in TIPOS_PROCEDIMENTOS.items()
+    ),
+    re.IGNORECASE,
+)
+_SENTENCA_RE = re.compile(
+    "|".join(re.escape(p) for p in PALAVRAS_SENTENCA_FAVORAVEL), re.IGNORECASE
+)
+
 # Valores estimados por tipo (em R$)
 VALORES_ESTIMADOS = {
     "cirurgia": (20000, 80000),
@@ -70,49 +109,135 @@ VALORES_ESTIMADOS = {
 }
 
 
+def _new_driver(headless: bool = True):
+    """Cria uma instância headless do Chrome com as opções padrão."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    logger.info("Inicializando navegador Chrome...")
+    chrome_options = Options()
+
+    if headless:
+        chrome_options.add_argument("--headless")
+
+    # Retornar no DOMContentLoaded: o texto dos resultados já está no DOM
+    # e não precisamos esperar o load completo de subrecursos
+    chrome_options.page_load_strategy = "eager"
+
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+
+    # Só precisamos do texto: bloquear imagens/CSS/fontes corta a maior
+    # parte dos bytes baixados por navegação
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+    })
+
+    driver = webdriver.Chrome(options=chrome_options)
+    logger.info("Navegador inicializado com sucesso")
+    return driver
+
+
+# Pool de navegadores quentes: o startup do chromedriver custa segundos e
+# o retry da ingestão multiplicava esse custo a cada tentativa.
+# _init_driver toma emprestado daqui e _close_driver devolve.
+_DRIVER_POOL: queue.Queue = queue.Queue(maxsize=2)
+
+
+# Ponto médio pré-computado por tipo: evita refazer a conta a cada chamada
+_VALOR_MEDIO = {tipo: (lo + hi) / 2 for tipo, (lo, hi) in VALORES_ESTIMADOS.items()}
+
+# Prazo padrão dos casos capturados; construído uma vez no import
+_DELTA_30 = timedelta(days=30)
+
+# Campos constantes do caso: mesclados por {**template, ...} em vez de
+# reconstruir os literais repetidos a cada iteração
+_CASO_TEMPLATE = {
+    "court": "TJMG",
+    "jurisdiction": "Saúde",
+    "status": "open",
+}
+
+
 class TJMGAdapterReal(CourtAdapter):
     """
     Adapter REAL para captura de processos do TJMG.
     
     Usa Selenium para fazer scraping do PJe.
+
+    O driver persiste entre chamadas de fetch_cases (o boot do Chrome
+    custa segundos); usar como context manager para garantir o fechamento:
+
+        with TJMGAdapterReal() as adapter:
+            casos = adapter.fetch_cases()
     """
     
-    def __init__(self, headless: bool = True, max_processos: int = 30):
+    def __init__(self, headless: bool = True, max_processos: int = 30, driver=None):
         """
         Args:
             headless: Executar navegador em modo headless
             max_processos: Número máximo de processos a capturar
+            driver: Driver externo; quando fornecido, o ciclo de vida
+                é do chamador
         """
         self.headless = headless
         self.max_processos = max_processos
-        self.driver = None
+        self.driver = driver
+        self._owns_driver = driver is None
+        self.session = None
+    
+    def __enter__(self):
+        # Lazy: o Chrome só sobe se o fallback Selenium for necessário
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        # Em caso de exceção o estado da sessão do navegador é
+        # desconhecido: descartar em vez de devolver ao pool
+        self._close_driver(discard=exc_type is not None)
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        return False
     
     def _init_driver(self):
-        """Inicializa o navegador Chrome."""
+        """
+        Inicializa o navegador Chrome (se não recebeu um externo):
+        reaproveita um driver quente do pool quando houver.
+        """
         if self.driver:
             return
         
-        logger.info("Inicializando navegador Chrome...")
-        chrome_options = Options()
-        
-        if self.headless:
-            chrome_options.add_argument("--headless")
-        
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        try:
+            self.driver = _DRIVER_POOL.get_nowait()
+            logger.info("Reutilizando navegador do pool")
+            return
+        except queue.Empty:
+            pass
         
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            logger.info("Navegador inicializado com sucesso")
+            self.driver = _new_driver(self.headless)
         except Exception as e:
             logger.error(f"Erro ao inicializar navegador: {e}")
             raise
     
-    def _close_driver(self):
-        """Fecha o navegador."""
-        if self.driver:
+    def _close_driver(self, discard: bool = False):
+        """
+        Libera o navegador (apenas se for dono dele): devolve ao pool
+        para a próxima busca/tentativa, ou fecha se discard=True ou o
+        pool estiver cheio.
+        """
+        if self.driver and self._owns_driver:
+            if not discard:
+                try:
+                    _DRIVER_POOL.put_nowait(self.driver)
+                    self.driver = None
+                    return
+                except queue.Full:
+                    pass
             try:
                 self.driver.quit()
                 logger.info("Navegador fechado")
@@ -120,9 +245,118 @@ class TJMGAdapterReal(CourtAdapter):
                 pass
             self.driver = None
     
+    def _get_session(self) -> requests.Session:
+        """Sessão HTTP reutilizada (keep-alive + pool de conexões)."""
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update(_HTTP_HEADERS)
+        return self.session
+    
+    def _montar_processos(self, rows: list, termo_busca: str) -> List[Dict]:
+        """Converte pares (texto, url) de links de resultado em processos."""
+        processos = []
+        for texto_processo, url_processo in rows:
+            # Extrair número do processo
+            match_numero = _RE_NUMERO.search(texto_processo)
+            numero_processo = match_numero.group(1) if match_numero else None
+            
+            if not numero_processo:
+                continue
+            
+            # Extrair assunto: rpartition devolve a cauda em uma passada,
+            # sem alocar a lista intermediária do split
+            _, sep, tail = texto_processo.rpartition(" - ")
+            assunto = tail if sep else "N/A"
+            
+            processos.append({
+                "numero": numero_processo,
+                "assunto": assunto,
+                "texto_completo": texto_processo,
+                "url": url_processo,
+                "termo_busca": termo_busca
+            })
+        
+        return processos
+    
+    def _buscar_processos_http(self, termo_busca: str) -> List[Dict]:
+        """
+        Caminho rápido sem navegador: busca o formulário da consulta
+        pública, submete via POST e parseia o HTML com lxml. Um browser
+        completo custa ~100x mais que a requisição HTTP direta.
+
+        Levanta exceção em qualquer falha — o chamador cai no fallback
+        Selenium.
+        """
+        import lxml.html
+
+        session = self._get_session()
+        resp = session.get(PJE_URL, timeout=30)
+        resp.raise_for_status()
+        tree = lxml.html.fromstring(resp.content)
+        
+        # Localizar o formulário com o campo "Nome da Parte" e preservar
+        # os campos hidden originais (viewstate etc.)
+        for form in tree.forms:
+            campo_nome = None
+            for inp in form.xpath(".//input[@type='text' or not(@type)]"):
+                ident = (inp.get("id") or "") + (inp.get("placeholder") or "")
+                if "nome" in ident.lower():
+                    campo_nome = inp
+                    break
+            if campo_nome is not None:
+                break
+        else:
+            raise RuntimeError("Formulário de consulta não encontrado")
+        
+        data = dict(form.form_values())
+        data[campo_nome.get("name") or campo_nome.get("id")] = termo_busca
+
+        # form_values() omite os controles de submit; o PJe é JSF e sem o
+        # name/value do botão o POST não dispara a ação de pesquisa — o
+        # servidor devolve a própria página de busca, sem resultados
+        for botao in form.xpath(
+            ".//input[@type='submit'] | .//button[@type='submit' or not(@type)]"
+        ):
+            nome_botao = botao.get("name")
+            if nome_botao:
+                data[nome_botao] = botao.get("value") or ""
+                break
+
+        action = urljoin(PJE_URL, form.get("action") or "")
+        resp = session.post(action, data=data, timeout=30)
+        resp.raise_for_status()
+        
+        tree = lxml.html.fromstring(resp.content)
+        links = tree.xpath("//a[contains(@href, 'DetalheProcessoConsultaPublica')]")
+        rows = [
+            (link.text_content(), urljoin(PJE_URL, link.get("href") or ""))
+            for link in links[:self.max_processos]
+        ]
+        
+        logger.info(f"Encontrados {len(rows)} processos (HTTP)")
+        return self._montar_processos(rows, termo_busca)
+    
+    def _buscar_processos(self, termo_busca: str) -> List[Dict]:
+        """Busca com caminho HTTP primeiro e Selenium como fallback."""
+        try:
+            processos = self._buscar_processos_http(termo_busca)
+        except Exception as e:
+            logger.warning(f"Busca HTTP falhou ({e}); usando fallback Selenium")
+        else:
+            if processos:
+                return processos
+            # Zero resultados no caminho HTTP não é confiável: um POST que
+            # o JSF ignorou também produz página sem links. Confirmar no
+            # navegador antes de aceitar o vazio.
+            logger.warning(
+                "Busca HTTP retornou 0 processos; confirmando via Selenium"
+            )
+        self._init_driver()
+        return self._buscar_processos_pje(termo_busca)
+    
     def _buscar_processos_pje(self, termo_busca: str) -> List[Dict]:
         """
-        Busca processos no PJe por termo.
+        Busca processos no PJe por termo (via Selenium).
         
         Args:
             termo_busca: Termo para buscar (ex: "Secretaria de Saúde")
@@ -130,6 +364,11 @@ class TJMGAdapterReal(CourtAdapter):
         Returns:
             Lista de processos encontrados
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
         logger.info(f"Buscando processos: {termo_busca}")
         
         try:
@@ -147,39 +386,21 @@ class TJMGAdapterReal(CourtAdapter):
             btn_pesquisar = self.driver.find_element(By.XPATH, "//button[contains(text(), 'PESQUISAR') or contains(@id, 'pesquisar')]")
             btn_pesquisar.click()
             
-            time.sleep(5)  # Aguardar carregamento
-            
-            # Extrair processos
-            processos = []
-            links_processos = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'DetalheProcessoConsultaPublica')]")
+            # Esperar os resultados aparecerem (em vez de 5s fixos de sleep:
+            # segue assim que o primeiro link carrega)
+            try:
+                wait.until(EC.presence_of_element_located((By.XPATH, _XPATH_RESULT_LINKS)))
+            except TimeoutException:
+                logger.info("Nenhum resultado para o termo (timeout na espera)")
+                return []
             
-            logger.info(f"Encontrados {len(links_processos)} processos")
+            # Extrair processos: texto e href de todos os links em uma
+            # única execução de JS (evita ~2 round-trips Selenium por link)
+            rows = self.driver.execute_script(_JS_EXTRACT_LINKS, self.max_processos)
             
-            for link in links_processos[:self.max_processos]:
-                texto_processo = link.text
-                url_processo = link.get_attribute("href")
-                
-                # Extrair número do processo
-                match_numero = re.search(r'(\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4})', texto_processo)
-                numero_processo = match_numero.group(1) if match_numero else None
-                
-                if not numero_processo:
-                    continue
-                
-                # Extrair assunto
-                assunto = texto_processo.split(" - ")[-1] if " - " in texto_processo else "N/A"
-                
-                processo = {
-                    "numero": numero_processo,
-                    "assunto": assunto,
-                    "texto_completo": texto_processo,
-                    "url": url_processo,
-                    "termo_busca": termo_busca
-                }
-                
-                processos.append(processo)
+            logger.info(f"Encontrados {len(rows)} processos")
             
-            return processos
+            return self._montar_processos(rows, termo_busca)
             
         except Exception as e:
             logger.error(f"Erro na busca: {e}")
@@ -192,15 +413,10 @@ class TJMGAdapterReal(CourtAdapter):
         Returns:
             (tipo, valor_estimado)
         """
-        texto_lower = texto.lower()
-        
-        for tipo, palavras in TIPOS_PROCEDIMENTOS.items():
-            for palavra in palavras:
-                if palavra in texto_lower:
-                    # Gerar valor estimado
-                    min_val, max_val = VALORES_ESTIMADOS.get(tipo, (5000, 30000))
-                    valor = (min_val + max_val) / 2
-                    return tipo, valor
+        m = _CLASSIFIER_RE.search(texto)
+        if m:
+            tipo = m.lastgroup
+            return tipo, _VALOR_MEDIO[tipo]
         
         # Padrão se não identificar
         return "tratamento", 15000.0
@@ -209,15 +425,14 @@ class TJMGAdapterReal(CourtAdapter):
         """
         Identifica se há sentença favorável no texto.
         """
-        texto_lower = texto.lower()
-        return any(palavra in texto_lower for palavra in PALAVRAS_SENTENCA_FAVORAVEL)
+        return _SENTENCA_RE.search(texto) is not None
     
     def _extrair_municipio(self, texto: str) -> str:
         """
         Extrai município do texto do processo.
         """
         # Tentar extrair da comarca
-        match = re.search(r'Comarca[:\s]+([A-Za-zÀ-ÿ\s]+)', texto, re.IGNORECASE)
+        match = _RE_COMARCA.search(texto)
         if match:
             return match.group(1).strip()
         
@@ -228,7 +443,18 @@ class TJMGAdapterReal(CourtAdapter):
         """
         Gera hash anônimo do paciente baseado no número do processo.
         """
-        return hashlib.sha256(numero_processo.encode()).hexdigest()[:16]
+        # digest()[:8].hex() produz os mesmos 16 hex chars sem converter os
+        # 32 bytes inteiros; números de processo são ASCII puro
+        return hashlib.sha256(numero_processo.encode("ascii")).digest()[:8].hex()
+    
+    def _buscar_termo_worker(self, termo: str) -> List[Dict]:
+        """
+        Busca um termo num adapter isolado: requests.Session e WebDriver
+        não são thread-safe, então cada worker usa os seus.
+        """
+        worker = TJMGAdapterReal(headless=self.headless, max_processos=self.max_processos)
+        with worker:
+            return worker._buscar_processos(termo)
     
     def fetch_cases(self) -> List[Dict]:
         """
@@ -240,62 +466,62 @@ class TJMGAdapterReal(CourtAdapter):
         logger.info("Iniciando captura de processos do TJMG...")
         
         try:
-            self._init_driver()
+            # Todos os termos em paralelo: as buscas são dominadas por
+            # espera de rede (o GIL é liberado), então o wall time cai
+            # para o termo mais lento em vez da soma
+            with ThreadPoolExecutor(max_workers=len(TERMOS_BUSCA)) as executor:
+                resultados = list(executor.map(self._buscar_termo_worker, TERMOS_BUSCA))
             
+            # Mesclar deduplicando por número (o mesmo processo pode
+            # aparecer em mais de um termo)
+            vistos = set()
             todos_processos = []
-            
-            # Buscar por cada termo
-            for termo in TERMOS_BUSCA[:1]:  # Começar com 1 termo
-                processos = self._buscar_processos_pje(termo)
-                todos_processos.extend(processos)
-                
-                if len(todos_processos) >= self.max_processos:
-                    break
+            for processos in resultados:
+                for proc in processos:
+                    if proc["numero"] not in vistos:
+                        vistos.add(proc["numero"])
+                        todos_processos.append(proc)
+            todos_processos = todos_processos[:self.max_processos]
             
             logger.info(f"Total de processos capturados: {len(todos_processos)}")
             
+            # Prazo e timestamp de captura não mudam por processo
+            due_date = datetime.now().date() + _DELTA_30
+            captura_data = datetime.now().isoformat()
+
             # Converter para formato do sistema
             casos = []
             for proc in todos_processos:
+                # Filtro barato primeiro: a maioria dos processos é
+                # rejeitada aqui, sem pagar classificação/município/hash
+                if not self._identificar_sentenca_favoravel(proc["texto_completo"]):
+                    continue
+
                 # Classificar tipo de procedimento
                 tipo, valor = self._classificar_tipo_procedimento(
                     proc["assunto"] + " " + proc["texto_completo"]
                 )
-                
-                # Verificar sentença favorável
-                sentenca_favoravel = self._identificar_sentenca_favoravel(
-                    proc["texto_completo"]
-                )
-                
-                # Apenas processos com sentença favorável
-                if not sentenca_favoravel:
-                    continue
-                
+
                 # Extrair município
                 municipio = self._extrair_municipio(proc["texto_completo"])
-                
+
                 # Gerar hash do paciente
                 patient_hash = self._gerar_patient_hash(proc["numero"])
-                
-                # Calcular prazo (30 dias a partir de hoje)
-                due_date = datetime.now().date() + timedelta(days=30)
-                
+
                 caso = {
-                    "court": "TJMG",
-                    "jurisdiction": "Saúde",
+                    **_CASO_TEMPLATE,
                     "case_number": proc["numero"],
                     "patient_hash": patient_hash,
                     "procedure": tipo.capitalize(),
                     "municipality": municipio,
                     "value_estimate": valor,
-                    "status": "open",
                     "due_date": due_date,
                     "meta": {
                         "assunto": proc["assunto"],
                         "url": proc["url"],
                         "termo_busca": proc["termo_busca"],
                         "source": "pje_tjmg_real",
-                        "captura_data": datetime.now().isoformat()
+                        "captura_data": captura_data
                     }
                 }
                 
@@ -309,7 +535,4 @@ class TJMGAdapterReal(CourtAdapter):
             import traceback
             traceback.print_exc()
             return []
-        
-        finally:
-            self._close_driver()
 
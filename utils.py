@@ -1,20 +1,27 @@
 import unicodedata
+from functools import lru_cache
 from typing import Optional
 
+# Tabela de tradução mapeando combining marks (categoria Mn) para None:
+# str.translate percorre a string inteira em C, sem chamada Python por
+# caractere. A faixa 0x0300–0x036F cobre todos os acentos do português
+# (o NFD decompõe á -> a + U+0301 etc.).
+_COMBINING_MARKS_TABLE = dict.fromkeys(range(0x0300, 0x0370))
+
+@lru_cache(maxsize=4096)
+def _normalize_cached(text: str) -> str:
+    # Normalizar unicode (NFD = decomposição canônica) e remover acentos;
+    # converter para minúsculas e remover espaços extras
+    nfd = unicodedata.normalize('NFD', text)
+    return nfd.translate(_COMBINING_MARKS_TABLE).lower().strip()
+
 def normalize_string(text: Optional[str]) -> Optional[str]:
     """
     Normaliza string removendo acentos e convertendo para minúsculas.
     Útil para buscas case-insensitive e accent-insensitive.
-    """
-    if not text:
-        return text
-    
-    # Normalizar unicode (NFD = decomposição canônica)
-    nfd = unicodedata.normalize('NFD', text)
-    
-    # Remover acentos (categoria Mn = Nonspacing Mark)
-    without_accents = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
-    
-    # Converter para minúsculas e remover espaços extras
-    return without_accents.lower().strip()
 
+    Os mesmos municípios/procedimentos se repetem muito (filtros de busca e
+    ingestão em lote), então o resultado é memoizado com LRU. None/vazio
+    retorna antes do cache — não gasta slot nem hashing com entrada falsy.
+    """
+    return text if not text else _normalize_cached(text)